@@ -8,7 +8,7 @@ Github repo: https://github.com/taskiq-python/taskiq-dependencies
 """
 
 from taskiq_dependencies.dependency import Depends
-from taskiq_dependencies.graph import DependencyGraph
+from taskiq_dependencies.graph import DependencyGraph, build_graph
 from taskiq_dependencies.utils import ParamInfo
 
-__all__ = ["DependencyGraph", "Depends", "ParamInfo"]
+__all__ = ["DependencyGraph", "Depends", "ParamInfo", "build_graph"]
@@ -1,11 +1,28 @@
-import asyncio
-import inspect
-from collections import defaultdict
-from copy import copy
 from logging import getLogger
-from typing import TYPE_CHECKING, Any, DefaultDict, Dict, Generator, List, Optional
-
-from taskiq_dependencies.utils import ParamInfo, isasynccontextmanager, iscontextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Coroutine,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from taskiq_dependencies.dependency import Dependency
+from taskiq_dependencies.utils import (
+    ASYNC_CONTEXT_MANAGER_KIND,
+    ASYNC_GENERATOR_KIND,
+    CONTEXT_MANAGER_KIND,
+    COROUTINE_KIND,
+    GENERATOR_KIND,
+    VALUE_KIND,
+    ParamInfo,
+    get_value_kind,
+)
 
 if TYPE_CHECKING:
     from taskiq_dependencies.graph import DependencyGraph  # pragma: no cover
@@ -13,10 +30,238 @@ if TYPE_CHECKING:
 
 logger = getLogger("taskiq.dependencies.ctx")
 
+# Handler calculates value of a parameter
+# that doesn't need to be resolved as a subgraph.
+ActionHandler = Callable[
+    ["BaseResolveContext", Dependency, Dependency, "_DependencyCache"],
+    Any,
+]
+# Action is a tuple of handler, sub-dependency
+# and a subgraph to resolve. Actions have either handler
+# or a subgraph, but never both.
+HandlerAction = Tuple[ActionHandler, Dependency, None]
+SubgraphAction = Tuple[None, Dependency, "DependencyGraph"]
+ResolveAction = Union[HandlerAction, SubgraphAction]
+# Step is a tuple of dependency, actions to get its parameters
+# and a function to call after that. Kwargs of the dependency
+# are already bound to this function. Target function
+# is never called, so it has None instead.
+ResolveStep = Tuple[
+    Dependency,
+    Tuple[ResolveAction, ...],
+    Optional[Callable[..., Any]],
+]
+
+# Marker for values that weren't found in caches.
+_MISSING = object()
+
+
+class _KwargsCache:
+    """
+    Cache for dependencies with kwargs.
+
+    Results are stored by dependency function and its kwargs.
+    Hashable kwargs are used as keys directly, but users may pass
+    unhashable objects as kwargs. Such results are kept
+    in a flat list of (function, kwargs, result) tuples,
+    and we compare kwargs to find them.
+    """
+
+    __slots__ = ("hashed", "unhashable")
+
+    def __init__(self) -> None:
+        self.hashed: Dict[Tuple[Any, FrozenSet[Tuple[str, Any]]], Any] = {}
+        self.unhashable: List[Tuple[Any, Dict[str, Any], Any]] = []
+
+    def get(self, dep: Dependency) -> Any:
+        """
+        Get cached result of a dependency.
+
+        :param dep: dependency with kwargs.
+        :return: cached value or _MISSING.
+        """
+        if dep.frozen_kwargs is not None:
+            return self.hashed.get((dep.dependency, dep.frozen_kwargs), _MISSING)
+        for func, cached_kwargs, value in self.unhashable:
+            if func == dep.dependency and cached_kwargs == dep.kwargs:
+                return value
+        return _MISSING
+
+    def set(self, dep: Dependency, value: Any) -> None:
+        """
+        Save result of a dependency.
+
+        :param dep: dependency with kwargs.
+        :param value: calculated value.
+        """
+        if dep.frozen_kwargs is not None:
+            self.hashed[(dep.dependency, dep.frozen_kwargs)] = value
+        else:
+            self.unhashable.append((dep.dependency, dep.kwargs, value))
+
+
+class _DependencyCache:
+    """
+    Cache of calculated dependencies.
+
+    Dependencies without kwargs are stored by their functions,
+    dependencies with kwargs are stored by functions and kwargs.
+    """
+
+    __slots__ = ("initial", "kwargs_cache", "values")
+
+    def __init__(self, initial_cache: Dict[Any, Any]) -> None:
+        # Initial cache is only read, calculated values
+        # are stored separately. This way we don't need to copy
+        # initial cache on every resolve, and it stays untouched
+        # for dependencies that don't use cache.
+        self.initial = initial_cache
+        self.values: Dict[Any, Any] = {}
+        # Cache for all dependencies with kwargs.
+        self.kwargs_cache = _KwargsCache()
+
+    def __contains__(self, dep: Dependency) -> bool:
+        if dep.dependency in self.values or dep.dependency in self.initial:
+            return True
+        return bool(dep.kwargs) and self.kwargs_cache.get(dep) is not _MISSING
+
+    def get(self, dep: Dependency) -> Any:
+        """
+        Get calculated value of a dependency.
+
+        :param dep: dependency to get.
+        :return: calculated value.
+        """
+        value = _MISSING
+        if dep.kwargs:
+            value = self.kwargs_cache.get(dep)
+        if value is _MISSING:
+            value = self.values.get(dep.dependency, _MISSING)
+        if value is _MISSING:
+            value = self.initial[dep.dependency]
+        return value
+
+    def set(self, dep: Dependency, value: Any) -> None:
+        """
+        Save calculated value of a dependency.
+
+        :param dep: calculated dependency.
+        :param value: calculated value.
+        """
+        if dep.kwargs:
+            self.kwargs_cache.set(dep, value)
+        else:
+            self.values[dep.dependency] = value
+
+
+def _close_generator(dep: Any, args: Tuple[Any, ...], exception_found: bool) -> None:
+    """
+    Run teardown of a generator dependency.
+
+    :param dep: opened generator.
+    :param args: exception info if any.
+    :param exception_found: whether exception should be thrown into generator.
+    """
+    if exception_found:
+        try:
+            dep.throw(*args)
+        except StopIteration:
+            pass
+        except BaseException as exc:
+            logger.warning(
+                "Exception found on dependency teardown %s",
+                exc,
+                exc_info=True,
+            )
+        return
+    for _ in dep:
+        pass
+
+
+def _close_context_manager(
+    dep: Any,
+    args: Tuple[Any, ...],
+    exception_found: bool,
+) -> None:
+    """
+    Exit context manager dependency.
+
+    :param dep: opened context manager.
+    :param args: exception info if any.
+    :param exception_found: unused, context managers always get exception info.
+    """
+    dep.__exit__(*args)
+
+
+async def _close_async_generator(
+    dep: Any,
+    args: Tuple[Any, ...],
+    exception_found: bool,
+) -> None:
+    """
+    Run teardown of an async generator dependency.
+
+    :param dep: opened async generator.
+    :param args: exception info if any.
+    :param exception_found: whether exception should be thrown into generator.
+    """
+    if exception_found:
+        try:
+            await dep.athrow(*args)
+        except StopAsyncIteration:
+            pass
+        except BaseException as exc:
+            logger.warning(
+                "Exception found on dependency teardown %s",
+                exc,
+                exc_info=True,
+            )
+        return
+    async for _ in dep:
+        pass
+
+
+async def _close_async_context_manager(
+    dep: Any,
+    args: Tuple[Any, ...],
+    exception_found: bool,
+) -> None:
+    """
+    Exit async context manager dependency.
+
+    :param dep: opened async context manager.
+    :param args: exception info if any.
+    :param exception_found: unused, context managers always get exception info.
+    """
+    await dep.__aexit__(*args)
+
+
+# Teardown functions for every kind of opened dependencies.
+_SYNC_CLOSERS: Dict[int, Callable[[Any, Tuple[Any, ...], bool], None]] = {
+    GENERATOR_KIND: _close_generator,
+    CONTEXT_MANAGER_KIND: _close_context_manager,
+}
+_ASYNC_CLOSERS: Dict[
+    int,
+    Callable[[Any, Tuple[Any, ...], bool], Coroutine[Any, Any, None]],
+] = {
+    ASYNC_GENERATOR_KIND: _close_async_generator,
+    ASYNC_CONTEXT_MANAGER_KIND: _close_async_context_manager,
+}
+
 
 class BaseResolveContext:
     """Base resolver context."""
 
+    __slots__ = (
+        "graph",
+        "initial_cache",
+        "main_graph",
+        "opened_dependencies",
+        "propagate_excs",
+        "sub_contexts",
+    )
+
     def __init__(
         self,
         graph: "DependencyGraph",
@@ -27,117 +272,75 @@ class BaseResolveContext:
         self.graph = graph
         # Main graph that contains all the subgraphs.
         self.main_graph = main_graph
-        self.opened_dependencies: List[Any] = []
+        # Opened generators and context managers
+        # are stored along with their kinds.
+        self.opened_dependencies: List[Tuple[int, Any]] = []
         self.sub_contexts: "List[Any]" = []
-        self.initial_cache = initial_cache or {}
+        self.initial_cache: Dict[Any, Any] = initial_cache or {}
         self.propagate_excs = exception_propagation
 
-    def traverse_deps(  # noqa: C901
-        self,
-    ) -> "Generator[DependencyGraph | Any, None, Dict[str, Any]]":
+    def exception_found(self, args: Tuple[Any, ...]) -> bool:
         """
-        This function is used to traverse all dependencies and resolve them.
+        Check whether exception should be propagated to dependencies.
 
-        It travels to all dependencies, everytime it need to resolve
-        something it yields it and waits for the resolving result.
+        :param args: exception info passed to close.
+        :return: True if exception was found and should be propagated.
+        """
+        return self.propagate_excs and len(args) > 1 and args[1] is not None
 
-        :return: resolved kwargs.
-        :yield: a function or a graph to resolve.
+    def get_initial_value(self, dep: Dependency) -> Any:
         """
-        # If we have nothing to calculate, we return
-        # an empty dict.
-        if self.graph.is_empty():
-            return {}
-        kwargs: Dict[str, Any] = {}
-        # We need to copy cache, in order
-        # to separate dependencies that use cache,
-        # from dependencies that aren't.
-        cache = copy(self.initial_cache)
-        # Cache for all dependencies with kwargs.
-        kwargs_cache: "DefaultDict[Any, List[Any]]" = defaultdict(list)
-        # We iterate over topologicaly sorted list of dependencies.
-        for index, dep in enumerate(self.graph.ordered_deps):
-            # If this dependency doesn't use cache,
-            # we don't need to calculate it, since it may be met
-            # later.
-            if not dep.use_cache:
-                continue
-            # If somehow we have dependency with unknown function.
-            if dep.dependency is None:
-                continue
-            # If dependency is already calculated.
-            if dep.dependency in cache:
-                continue
-            # For dependencies with kwargs we check kwarged cache.
-            elif dep.kwargs and dep.dependency in kwargs_cache:
-                cache_hit = False
-                # We have to iterate over all cached dependencies with
-                # kwargs, because users may pass unhashable objects as kwargs.
-                # That's why we cannot use them as dict keys.
-                for cached_kwargs, _ in kwargs_cache[dep.dependency]:
-                    if cached_kwargs == dep.kwargs:
-                        cache_hit = True
-                        break
-                if cache_hit:
-                    continue
+        Get value of a dependency from the initial cache.
 
-            kwargs = {}
-            # Now we get list of dependencies for current top-level dependency
-            # and iterate over it.
-            for subdep in self.graph.dependencies[dep]:
-                # If we don't have known dependency function,
-                # we skip it.
-                if subdep.dependency is None:
-                    continue
-                # If the user want to get ParamInfo,
-                # we get declaration of the current dependency.
-                if subdep.dependency == ParamInfo:
-                    kwargs[subdep.param_name] = ParamInfo(
-                        dep.param_name,
-                        self.main_graph,
-                        dep.signature,
-                    )
-                    continue
-                if subdep.use_cache:
-                    # If this dependency can be calculated, using cache,
-                    # we try to get it from cache.
-                    if subdep.kwargs and subdep.dependency in kwargs_cache:
-                        for cached_kwargs, kw_cache in kwargs_cache[subdep.dependency]:
-                            if cached_kwargs == subdep.kwargs:
-                                kwargs[subdep.param_name] = kw_cache
-                                break
-                    else:
-                        kwargs[subdep.param_name] = cache[subdep.dependency]
-                else:
-                    # If this dependency doesn't use cache,
-                    # we resolve it's dependencies and
-                    # run it.
-                    resolved_kwargs = yield self.graph.subgraphs[subdep]
-                    # Subgraph wasn't resolved.
-                    if resolved_kwargs is None:
-                        continue
-                    if subdep.kwargs:
-                        resolved_kwargs.update(subdep.kwargs)
-                    kwargs[subdep.param_name] = yield subdep.dependency(
-                        **resolved_kwargs,
-                    )
-
-            # We don't want to calculate least function,
-            # Because it's a target function.
-            if (
-                index < len(self.graph.ordered_deps) - 1
-                # We skip all ParamInfo dependencies,
-                # because we calculate them when needed.
-                and dep.dependency != ParamInfo
-            ):
-                user_kwargs = copy(dep.kwargs)
-                user_kwargs.update(kwargs)
-                resolved = yield dep.dependency(**user_kwargs)
-                if dep.kwargs:
-                    kwargs_cache[dep.dependency].append((dep.kwargs, resolved))
-                else:
-                    cache[dep.dependency] = resolved
-        return kwargs
+        Values from the initial cache are provided by users,
+        so they are used even by dependencies that don't use cache.
+
+        :param dep: dependency to find.
+        :return: value from the initial cache or _MISSING.
+        """
+        if not self.initial_cache:
+            return _MISSING
+        try:
+            return self.initial_cache.get(dep.dependency, _MISSING)
+        except TypeError:
+            # Dependencies without cache may be unhashable.
+            return _MISSING
+
+
+def param_info_handler(
+    ctx: BaseResolveContext,
+    dep: Dependency,
+    subdep: Dependency,
+    cache: _DependencyCache,
+) -> Any:
+    """
+    Get declaration of the current dependency.
+
+    :param ctx: current resolver context.
+    :param dep: dependency which parameter we calculate.
+    :param subdep: dependency of the parameter.
+    :param cache: cache of calculated dependencies.
+    :return: ParamInfo of the dependency.
+    """
+    return ParamInfo(dep.param_name, ctx.main_graph, dep.signature)
+
+
+def cached_value_handler(
+    ctx: BaseResolveContext,
+    dep: Dependency,
+    subdep: Dependency,
+    cache: _DependencyCache,
+) -> Any:
+    """
+    Get already calculated value of a dependency.
+
+    :param ctx: current resolver context.
+    :param dep: dependency which parameter we calculate.
+    :param subdep: dependency of the parameter.
+    :param cache: cache of calculated dependencies.
+    :return: cached value.
+    """
+    return cache.get(subdep)
 
 
 class SyncResolveContext(BaseResolveContext):
@@ -151,6 +354,10 @@ class SyncResolveContext(BaseResolveContext):
     It uses graph, but it doesn't modify it.
     """
 
+    __slots__ = ()
+
+    sub_contexts: "List[SyncResolveContext]"
+
     def __enter__(self) -> "SyncResolveContext":
         return self
 
@@ -165,32 +372,27 @@ class SyncResolveContext(BaseResolveContext):
 
         :param args: exception info if any.
         """
-        exception_found = False
-        if self.propagate_excs and len(args) > 1 and args[1] is not None:
-            exception_found = True
+        exception_found = self.exception_found(args)
         for ctx in self.sub_contexts:
             ctx.close(*args)
-        for dep in reversed(self.opened_dependencies):
-            if inspect.isgenerator(dep):
-                if exception_found:
-                    try:
-                        dep.throw(*args)
-                    except StopIteration:
-                        continue
-                    except BaseException as exc:
-                        logger.warning(
-                            "Exception found on dependency teardown %s",
-                            exc,
-                            exc_info=True,
-                        )
-                        continue
-                    continue
-                for _ in dep:
-                    pass
-            elif iscontextmanager(dep):
-                dep.__exit__(*args)
+        for kind, dep in reversed(self.opened_dependencies):
+            _SYNC_CLOSERS[kind](dep, args, exception_found)
+
+    def resolve_subgraph(self, graph: "DependencyGraph") -> Dict[str, Any]:
+        """
+        Resolve kwargs of a dependency that doesn't use cache.
 
-    def resolver(self, executed_func: Any, initial_cache: Dict[Any, Any]) -> Any:
+        Subgraph is resolved in a separate context,
+        which is closed along with the current one.
+
+        :param graph: subgraph of the dependency.
+        :return: dict with resolved kwargs.
+        """
+        ctx = SyncResolveContext(graph, self.main_graph, self.initial_cache)
+        self.sub_contexts.append(ctx)
+        return ctx.resolve_kwargs()
+
+    def resolver(self, executed_func: Any) -> Any:
         """
         Sync resolver.
 
@@ -198,33 +400,23 @@ class SyncResolveContext(BaseResolveContext):
         to resolve dependencies.
 
         :param executed_func: function to resolve.
-        :param initial_cache: cache to build a context if graph was passed.
         :raises RuntimeError: if async function is passed as the dependency.
 
-        :return: dict with resolved kwargs.
+        :return: resolved value.
         """
-        if getattr(executed_func, "dep_graph", False):
-            ctx = SyncResolveContext(executed_func, self.main_graph, initial_cache)
-            self.sub_contexts.append(ctx)
-            sub_result = ctx.resolve_kwargs()
-        elif inspect.isgenerator(executed_func):
+        kind = get_value_kind(executed_func)
+        if kind == VALUE_KIND:
+            return executed_func
+        if kind == GENERATOR_KIND:
             sub_result = next(executed_func)
-            self.opened_dependencies.append(executed_func)
-        elif asyncio.iscoroutine(executed_func):
-            raise RuntimeError(
-                "Coroutines cannot be used in sync context. "
-                "Please use async context instead.",
-            )
-        elif iscontextmanager(executed_func):
+        elif kind == CONTEXT_MANAGER_KIND:
             sub_result = executed_func.__enter__()
-            self.opened_dependencies.append(executed_func)
-        elif inspect.isasyncgen(executed_func) or isasynccontextmanager(executed_func):
+        else:
             raise RuntimeError(
                 "Coroutines cannot be used in sync context. "
                 "Please use async context instead.",
             )
-        else:
-            sub_result = executed_func
+        self.opened_dependencies.append((kind, executed_func))
         return sub_result
 
     def resolve_kwargs(
@@ -238,14 +430,44 @@ class SyncResolveContext(BaseResolveContext):
 
         :return: Dict with keyword arguments.
         """
-        try:
-            generator = self.traverse_deps()
-            dependency = generator.send(None)
-            while True:
-                kwargs = self.resolver(dependency, self.initial_cache)
-                dependency = generator.send(kwargs)
-        except StopIteration as exc:
-            return exc.value  # type: ignore
+        # If we have nothing to calculate, we return
+        # an empty dict.
+        if self.graph.is_empty():
+            return {}
+        kwargs: Dict[str, Any] = {}
+        cache = _DependencyCache(self.initial_cache)
+        # We iterate over precompiled resolution plan.
+        # It only contains dependencies that use cache,
+        # in topological order.
+        for dep, actions, call in self.graph.plan:
+            # If dependency is already calculated.
+            if dep in cache:
+                continue
+            kwargs = {}
+            for action in actions:
+                if action[0] is not None:
+                    handler, subdep, _ = action
+                    kwargs[subdep.param_name] = handler(self, dep, subdep, cache)
+                    continue
+                _, subdep, subgraph = action
+                value = self.get_initial_value(subdep)
+                if value is not _MISSING:
+                    kwargs[subdep.param_name] = value
+                    continue
+                # If this dependency doesn't use cache,
+                # we resolve it's dependencies and
+                # run it. Target of the subgraph is the dependency function.
+                resolved_kwargs = self.resolve_subgraph(subgraph)
+                if subdep.kwargs:
+                    resolved_kwargs.update(subdep.kwargs)
+                kwargs[subdep.param_name] = self.resolver(
+                    subgraph.target(**resolved_kwargs),
+                )
+            # Target function is never called during resolution.
+            if call is not None:
+                resolved = self.resolver(call(**kwargs))
+                cache.set(dep, resolved)
+        return kwargs
 
 
 class AsyncResolveContext(BaseResolveContext):
@@ -259,13 +481,17 @@ class AsyncResolveContext(BaseResolveContext):
     It uses graph, but it doesn't modify it.
     """
 
+    __slots__ = ()
+
+    sub_contexts: "List[AsyncResolveContext]"
+
     async def __aenter__(self) -> "AsyncResolveContext":
         return self
 
     async def __aexit__(self, *args: object) -> None:
         await self.close(*args)
 
-    async def close(self, *args: Any) -> None:  # noqa: C901
+    async def close(self, *args: Any) -> None:
         """
         Close all opened dependencies.
 
@@ -273,54 +499,31 @@ class AsyncResolveContext(BaseResolveContext):
 
         :param args: exception info if any.
         """
-        exception_found = False
-        if self.propagate_excs and len(args) > 1 and args[1] is not None:
-            exception_found = True
+        exception_found = self.exception_found(args)
         for ctx in self.sub_contexts:
-            await ctx.close(*args)  # type: ignore
-        for dep in reversed(self.opened_dependencies):
-            if inspect.isgenerator(dep):
-                if exception_found:
-                    try:
-                        dep.throw(*args)
-                    except StopIteration:
-                        continue
-                    except BaseException as exc:
-                        logger.warning(
-                            "Exception found on dependency teardown %s",
-                            exc,
-                            exc_info=True,
-                        )
-                        continue
-                    continue
-                for _ in dep:
-                    pass
-            elif inspect.isasyncgen(dep):
-                if exception_found:
-                    try:
-                        await dep.athrow(*args)
-                    except StopAsyncIteration:
-                        continue
-                    except BaseException as exc:
-                        logger.warning(
-                            "Exception found on dependency teardown %s",
-                            exc,
-                            exc_info=True,
-                        )
-                        continue
-                    continue
-                async for _ in dep:
-                    pass
-            elif iscontextmanager(dep):
-                dep.__exit__(*args)
-            elif isasynccontextmanager(dep):
-                await dep.__aexit__(*args)
-
-    async def resolver(
-        self,
-        executed_func: Any,
-        initial_cache: Dict[Any, Any],
-    ) -> Any:
+            await ctx.close(*args)
+        for kind, dep in reversed(self.opened_dependencies):
+            closer = _SYNC_CLOSERS.get(kind)
+            if closer is not None:
+                closer(dep, args, exception_found)
+            else:
+                await _ASYNC_CLOSERS[kind](dep, args, exception_found)
+
+    async def resolve_subgraph(self, graph: "DependencyGraph") -> Dict[str, Any]:
+        """
+        Resolve kwargs of a dependency that doesn't use cache.
+
+        Subgraph is resolved in a separate context,
+        which is closed along with the current one.
+
+        :param graph: subgraph of the dependency.
+        :return: dict with resolved kwargs.
+        """
+        ctx = AsyncResolveContext(graph, self.main_graph, self.initial_cache)
+        self.sub_contexts.append(ctx)
+        return await ctx.resolve_kwargs()
+
+    async def resolver(self, executed_func: Any) -> Any:
         """
         Async resolver.
 
@@ -328,29 +531,22 @@ class AsyncResolveContext(BaseResolveContext):
         to resolve dependencies.
 
         :param executed_func: function to resolve.
-        :param initial_cache: cache to build a context if graph was passed.
-        :return: dict with resolved kwargs.
+        :return: resolved value.
         """
-        if getattr(executed_func, "dep_graph", False):
-            ctx = AsyncResolveContext(executed_func, self.main_graph, initial_cache)  # type: ignore
-            self.sub_contexts.append(ctx)
-            sub_result = await ctx.resolve_kwargs()
-        elif inspect.isgenerator(executed_func):
+        kind = get_value_kind(executed_func)
+        if kind == VALUE_KIND:
+            return executed_func
+        if kind == COROUTINE_KIND:
+            return await executed_func
+        if kind == GENERATOR_KIND:
             sub_result = next(executed_func)
-            self.opened_dependencies.append(executed_func)
-        elif asyncio.iscoroutine(executed_func):
-            sub_result = await executed_func
-        elif inspect.isasyncgen(executed_func):
+        elif kind == ASYNC_GENERATOR_KIND:
             sub_result = await executed_func.__anext__()
-            self.opened_dependencies.append(executed_func)
-        elif iscontextmanager(executed_func):
+        elif kind == CONTEXT_MANAGER_KIND:
             sub_result = executed_func.__enter__()
-            self.opened_dependencies.append(executed_func)
-        elif isasynccontextmanager(executed_func):
-            sub_result = await executed_func.__aenter__()
-            self.opened_dependencies.append(executed_func)
         else:
-            sub_result = executed_func
+            sub_result = await executed_func.__aenter__()
+        self.opened_dependencies.append((kind, executed_func))
         return sub_result
 
     async def resolve_kwargs(
@@ -364,11 +560,41 @@ class AsyncResolveContext(BaseResolveContext):
 
         :return: Dict with keyword arguments.
         """
-        try:
-            generator = self.traverse_deps()
-            dependency = generator.send(None)
-            while True:
-                kwargs = await self.resolver(dependency, self.initial_cache)
-                dependency = generator.send(kwargs)
-        except StopIteration as exc:
-            return exc.value  # type: ignore
+        # If we have nothing to calculate, we return
+        # an empty dict.
+        if self.graph.is_empty():
+            return {}
+        kwargs: Dict[str, Any] = {}
+        cache = _DependencyCache(self.initial_cache)
+        # We iterate over precompiled resolution plan.
+        # It only contains dependencies that use cache,
+        # in topological order.
+        for dep, actions, call in self.graph.plan:
+            # If dependency is already calculated.
+            if dep in cache:
+                continue
+            kwargs = {}
+            for action in actions:
+                if action[0] is not None:
+                    handler, subdep, _ = action
+                    kwargs[subdep.param_name] = handler(self, dep, subdep, cache)
+                    continue
+                _, subdep, subgraph = action
+                value = self.get_initial_value(subdep)
+                if value is not _MISSING:
+                    kwargs[subdep.param_name] = value
+                    continue
+                # If this dependency doesn't use cache,
+                # we resolve it's dependencies and
+                # run it. Target of the subgraph is the dependency function.
+                resolved_kwargs = await self.resolve_subgraph(subgraph)
+                if subdep.kwargs:
+                    resolved_kwargs.update(subdep.kwargs)
+                kwargs[subdep.param_name] = await self.resolver(
+                    subgraph.target(**resolved_kwargs),
+                )
+            # Target function is never called during resolution.
+            if call is not None:
+                resolved = await self.resolver(call(**kwargs))
+                cache.set(dep, resolved)
+        return kwargs
@@ -1,5 +1,4 @@
 import inspect
-import uuid
 from contextlib import _AsyncGeneratorContextManager, _GeneratorContextManager
 from typing import (
     Any,
@@ -7,8 +6,10 @@ from typing import (
     Callable,
     Coroutine,
     Dict,
+    FrozenSet,
     Generator,
     Optional,
+    Tuple,
     Type,
     TypeVar,
     Union,
@@ -121,8 +122,21 @@ class Dependency:
     This class is used to mark parameters of a function,
     or a class as injectables, so taskiq can resolve it
     and calculate before execution.
+
+    Dependencies are hashed and compared by identity,
+    because every dependency is a separate node of a graph.
     """
 
+    __slots__ = (
+        "dependency",
+        "frozen_kwargs",
+        "kwargs",
+        "param_name",
+        "parent",
+        "signature",
+        "use_cache",
+    )
+
     def __init__(
         self,
         dependency: Optional[Union[Type[Any], Callable[..., Any]]] = None,
@@ -132,31 +146,21 @@ class Dependency:
         signature: Optional[inspect.Parameter] = None,
         parent: "Optional[Dependency]" = None,
     ) -> None:
-        self._id = uuid.uuid4()
         self.dependency = dependency
         self.use_cache = use_cache
         self.param_name = ""
         self.kwargs = kwargs or {}
+        # Frozen kwargs are used to find cached results
+        # of dependencies with kwargs. They are None
+        # if some values of kwargs are unhashable.
+        self.frozen_kwargs: Optional[FrozenSet[Tuple[str, Any]]]
+        try:
+            self.frozen_kwargs = frozenset(self.kwargs.items())
+        except TypeError:
+            self.frozen_kwargs = None
         self.signature = signature
         self.parent = parent
 
-    def __hash__(self) -> int:
-        return hash(self._id)
-
-    def __eq__(self, rhs: object) -> bool:
-        """
-        Overriden eq operation.
-
-        This is required to perform correct topological
-        sort after building dependency graph.
-
-        :param rhs: object to compare.
-        :return: True if objects are equal.
-        """
-        if not isinstance(rhs, Dependency):
-            return False
-        return self._id == rhs._id
-
     def __repr__(self) -> str:
         func_name = str(self.dependency)
         if self.dependency is not None and hasattr(self.dependency, "__name__"):
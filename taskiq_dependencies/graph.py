@@ -1,27 +1,284 @@
 import inspect
 import sys
 import warnings
-from collections import defaultdict, deque
+from collections import defaultdict
+from functools import partial
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, TypeVar, get_type_hints
+from types import FunctionType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    get_type_hints,
+)
+from weakref import WeakKeyDictionary, WeakValueDictionary
 
-from graphlib import TopologicalSorter
-
-from taskiq_dependencies.ctx import AsyncResolveContext, SyncResolveContext
+from taskiq_dependencies.ctx import (
+    AsyncResolveContext,
+    ResolveAction,
+    ResolveStep,
+    SyncResolveContext,
+    cached_value_handler,
+    param_info_handler,
+)
 from taskiq_dependencies.dependency import Dependency
 from taskiq_dependencies.utils import ParamInfo
 
-try:
-    from fastapi.params import Depends as FastapiDepends
-except ImportError:
-    FastapiDepends = None
+# FastAPI's Depends class. It's looked up lazily by
+# `_get_fastapi_depends`, so importing this module
+# doesn't import FastAPI.
+FastapiDepends: Any = None
+
+
+# This is for `from __future__ import annotations` support.
+# We need to use `eval_str` argument, because
+# signature of the function is a string, not an object.
+_SIGNATURE_KWARGS: Dict[str, Any] = {}
+if sys.version_info >= (3, 10):
+    _SIGNATURE_KWARGS["eval_str"] = True
+
+# Maximum number of graphs with replaced dependencies
+# that are kept for every graph.
+REPLACED_GRAPHS_LIMIT = 64
+
+# Parameters of a dependency function that have declared dependencies.
+DeclaredDependency = Tuple[str, inspect.Parameter, Dependency]
+# Declared dependencies and type hints of a dependency function.
+SignatureInfo = Tuple[Tuple[DeclaredDependency, ...], Dict[str, Any]]
+
+# Inspecting functions is the slowest part of building graphs,
+# so declared dependencies and type hints
+# are cached for every dependency function.
+# Weak references are used, so temporary functions can be collected.
+_SIGNATURES_CACHE: "WeakKeyDictionary[Any, SignatureInfo]" = WeakKeyDictionary()
+
+
+def _get_cached_signature(func: Any) -> Optional[SignatureInfo]:
+    """
+    Get cached signature of a dependency function.
+
+    :param func: dependency function.
+    :return: signature info or None if it wasn't cached.
+    """
+    try:
+        return _SIGNATURES_CACHE.get(func)
+    except TypeError:
+        # Objects may be unhashable or may not support weak references.
+        return None
+
+
+def _cache_signature(func: Any, signature_info: SignatureInfo) -> None:
+    """
+    Save signature of a dependency function.
+
+    Failed inspections are never cached, because
+    type hints may be resolvable later.
+
+    :param func: dependency function.
+    :param signature_info: signature and type hints of the function.
+    """
+    try:
+        _SIGNATURES_CACHE[func] = signature_info
+    except TypeError:
+        return
+
+
+def _get_source_location(source: Any) -> str:
+    """
+    Get location of a function or a class in source files.
+
+    Functions have their location in code objects,
+    so we don't need to read source files for them.
+
+    :param source: function or class.
+    :return: file and line number.
+    """
+    code = getattr(source, "__code__", None)
+    if code is not None:
+        src_file = Path(code.co_filename)
+        src_lineno = code.co_firstlineno
+    else:
+        _, src_lineno = inspect.getsourcelines(source)
+        src_file = Path(inspect.getfile(source))
+    cwd = Path.cwd()
+    if src_file.is_relative_to(cwd):
+        src_file = src_file.relative_to(cwd)
+    return f"{src_file}:{src_lineno}"
+
+
+def _get_fastapi_depends() -> Any:
+    """
+    Get FastAPI's Depends class if FastAPI is used.
+
+    Instances of FastAPI's Depends can only exist if
+    `fastapi.params` was already imported, so we
+    never import it ourselves.
+
+    :return: FastAPI's Depends class or None.
+    """
+    global FastapiDepends
+    if FastapiDepends is None:
+        fastapi_params = sys.modules.get("fastapi.params")
+        if fastapi_params is not None:
+            FastapiDepends = fastapi_params.Depends
+    return FastapiDepends
+
+
+def _get_declared_dependency(
+    param: inspect.Parameter,
+    marker_types: Tuple[type, ...],
+    fastapi_depends: Any,
+) -> Optional[Dependency]:
+    """
+    Find dependency declared for a parameter.
+
+    Dependencies can be declared as default values
+    or in Annotated metadata.
+
+    :param param: parameter of a dependency function.
+    :param marker_types: classes of dependency markers.
+    :param fastapi_depends: FastAPI's Depends class or None.
+    :return: declared dependency or None.
+    """
+    default_value = param.default
+    if hasattr(param.annotation, "__metadata__"):
+        # We go backwards,
+        # because you may want to override your annotation
+        # and the overriden value will appear to be after
+        # the original `Depends` annotation.
+        for meta in reversed(param.annotation.__metadata__):
+            if isinstance(meta, marker_types):
+                default_value = meta
+                break
+
+    # This is for FastAPI integration. So you can
+    # use Depends from taskiq mixed with fastapi's dependencies.
+    if fastapi_depends is not None and isinstance(
+        default_value,
+        fastapi_depends,
+    ):
+        default_value = Dependency(
+            dependency=default_value.dependency,
+            use_cache=default_value.use_cache,
+            signature=param,
+        )
+
+    # We check, that default value is an instance of
+    # TaskiqDepends.
+    if not isinstance(default_value, Dependency):
+        return None
+    return default_value
+
+
+def _get_declared_dependencies(
+    sign: inspect.Signature,
+) -> Tuple[DeclaredDependency, ...]:
+    """
+    Find all parameters with declared dependencies.
+
+    :param sign: signature of a dependency function.
+    :return: tuple of parameter names, parameters and their dependencies.
+    """
+    # FastAPI is either installed or not, so we check it
+    # once for all parameters.
+    fastapi_depends = _get_fastapi_depends()
+    marker_types: Tuple[type, ...] = (Dependency,)
+    if fastapi_depends is not None:
+        marker_types = (Dependency, fastapi_depends)
+    declared_deps = []
+    for param_name, param in sign.parameters.items():
+        declared_dep = _get_declared_dependency(
+            param,
+            marker_types,
+            fastapi_depends,
+        )
+        if declared_dep is not None:
+            declared_deps.append((param_name, param, declared_dep))
+    return tuple(declared_deps)
+
+
+def _kahn_order(successors: List[List[int]], indegrees: List[int]) -> List[int]:
+    """
+    Kahn's algorithm over integer indices.
+
+    It only works with ints and lists of ints,
+    so it doesn't depend on dependency objects at all.
+
+    If graph has cycles, nodes from the cycles are
+    not present in the result.
+
+    :param successors: indices of dependants for every node.
+    :param indegrees: number of dependencies for every node,
+        it's modified during sorting.
+    :return: indices of nodes in topological order.
+    """
+    # Queue of nodes that can be resolved.
+    # It's a list, because we never remove items from it.
+    queue = [index for index, indegree in enumerate(indegrees) if indegree == 0]
+    for index in queue:
+        for successor in successors[index]:
+            indegrees[successor] -= 1
+            if indegrees[successor] == 0:
+                queue.append(successor)
+    return queue
+
+
+def _topological_order(dependencies: Dict[Any, List[Dependency]]) -> List[Dependency]:
+    """
+    Sort dependencies in the order they should be resolved.
+
+    This is Kahn's algorithm over integer indices of dependencies.
+    The order is the same as the order of
+    graphlib.TopologicalSorter(dependencies).static_order(),
+    but it doesn't need to hash dependencies for every edge.
+
+    :param dependencies: dependencies and their subdependencies.
+    :raises ValueError: if dependencies have cycles.
+    :return: list of dependencies, dependants are after their dependencies.
+    """
+    # Most of graphs have only one dependant, the target function.
+    # All its dependencies are resolved before it, in their order.
+    if not dependencies:
+        return []
+    if len(dependencies) == 1:
+        [(dep, subdeps)] = dependencies.items()
+        return [*subdeps, dep]
+    indices: Dict[Dependency, int] = {}
+    nodes: List[Dependency] = []
+    # Dependants of every dependency.
+    successors: List[List[int]] = []
+    # Number of unresolved dependencies for every dependency.
+    indegrees: List[int] = []
+
+    def node_index(dep: Dependency) -> int:
+        index = indices.get(dep)
+        if index is None:
+            index = len(nodes)
+            indices[dep] = index
+            nodes.append(dep)
+            successors.append([])
+            indegrees.append(0)
+        return index
+
+    for dep, subdeps in dependencies.items():
+        dep_index = node_index(dep)
+        indegrees[dep_index] += len(subdeps)
+        for subdep in subdeps:
+            successors[node_index(subdep)].append(dep_index)
+
+    order = _kahn_order(successors, indegrees)
+    if len(order) != len(nodes):
+        raise ValueError("Dependency graph has cycles.")
+    return [nodes[index] for index in order]
 
 
 class DependencyGraph:
     """Class to build dependency graph from a function."""
 
-    dep_graph = True
-
     def __init__(
         self,
         target: Callable[..., Any],
@@ -34,8 +291,18 @@ class DependencyGraph:
         # Can be considered as sub graphs.
         self.subgraphs: Dict[Any, DependencyGraph] = {}
         self.ordered_deps: List[Dependency] = []
+        # Flat resolution plan, that is used by resolver contexts.
+        # It's a tuple, because graphs are shared between contexts.
+        self.plan: Tuple[ResolveStep, ...] = ()
         self.replaced_deps = replaced_deps
+        # Graphs with replaced dependencies, built for contexts.
+        self._replaced_graphs: Dict[Any, DependencyGraph] = {}
+        # Whether all dependencies were inspected successfully.
+        # Graphs with skipped dependencies are never reused,
+        # because they may be built differently later.
+        self.fully_inspected = True
         self._build_graph()
+        self._compile_plan()
 
     def is_empty(self) -> bool:
         """
@@ -45,6 +312,34 @@ class DependencyGraph:
         """
         return len(self.ordered_deps) <= 1
 
+    def _get_replaced_graph(self, replaced_deps: Dict[Any, Any]) -> "DependencyGraph":
+        """
+        Get graph of the target with replaced dependencies.
+
+        Usually the same dependencies are replaced for every context,
+        so graphs are built once for every set of replacements.
+
+        :param replaced_deps: dependencies to replace.
+        :return: graph with replaced dependencies.
+        """
+        try:
+            key = frozenset(replaced_deps.items())
+        except TypeError:
+            # Unhashable replacements, so we cannot reuse the graph.
+            return DependencyGraph(self.target, replaced_deps)
+        graph = self._replaced_graphs.get(key)
+        if graph is None:
+            graph = DependencyGraph(self.target, dict(replaced_deps))
+            # Graphs with skipped dependencies are built again next time.
+            if not graph.fully_inspected:
+                return graph
+            if len(self._replaced_graphs) >= REPLACED_GRAPHS_LIMIT:
+                # Drop the oldest graph. It may be already dropped
+                # by another thread, so we don't fail on that.
+                self._replaced_graphs.pop(next(iter(self._replaced_graphs)), None)
+            self._replaced_graphs[key] = graph
+        return graph
+
     def async_ctx(
         self,
         initial_cache: Optional[Dict[Any, Any]] = None,
@@ -64,7 +359,7 @@ class DependencyGraph:
         """
         graph = self
         if replaced_deps:
-            graph = DependencyGraph(self.target, replaced_deps)
+            graph = self._get_replaced_graph(replaced_deps)
         return AsyncResolveContext(
             graph,
             graph,
@@ -91,7 +386,7 @@ class DependencyGraph:
         """
         graph = self
         if replaced_deps:
-            graph = DependencyGraph(self.target, replaced_deps)
+            graph = self._get_replaced_graph(replaced_deps)
         return SyncResolveContext(
             graph,
             graph,
@@ -99,6 +394,102 @@ class DependencyGraph:
             exception_propagation,
         )
 
+    def _compile_plan(self) -> None:
+        """
+        Compiles resolution plan for the graph.
+
+        Plan contains only dependencies that must be resolved
+        using cache, in topological order. For each of them
+        we precompute actions to get values of its parameters,
+        so resolvers don't need to inspect the graph
+        every time they run.
+
+        Parameters that don't require resolving a subgraph
+        get a handler that calculates their values.
+        """
+        dependencies = self.dependencies
+        subgraphs = self.subgraphs
+        last_index = len(self.ordered_deps) - 1
+        steps: List[ResolveStep] = []
+        for index, dep in enumerate(self.ordered_deps):
+            # Dependencies without cache are resolved as subgraphs,
+            # and we cannot resolve dependencies with unknown functions.
+            if not dep.use_cache or dep.dependency is None:
+                continue
+            # ParamInfo is calculated only when requested by its dependant.
+            if dep.dependency is ParamInfo:
+                continue
+            actions: List[ResolveAction] = []
+            for subdep in dependencies.get(dep, []):
+                if subdep.dependency is None:
+                    continue
+                if subdep.dependency is ParamInfo:
+                    actions.append((param_info_handler, subdep, None))
+                elif subdep.use_cache:
+                    actions.append((cached_value_handler, subdep, None))
+                else:
+                    actions.append((None, subdep, subgraphs[subdep]))
+            # We don't want to calculate least function,
+            # because it's a target function.
+            call: Optional[Callable[..., Any]] = None
+            if index < last_index:
+                call = dep.dependency
+                # User kwargs are bound once. Resolved values
+                # passed to the call have priority over them.
+                if dep.kwargs:
+                    call = partial(call, **dep.kwargs)  # type: ignore[misc]
+            steps.append((dep, tuple(actions), call))
+        self.plan = tuple(steps)
+
+    def _inspect_dependency(
+        self,
+        dep: Dependency,
+        origin: Any,
+    ) -> Optional[SignatureInfo]:
+        """
+        Get declared dependencies and type hints of a dependency.
+
+        If type hints cannot be resolved, a warning is shown.
+
+        :param dep: dependency to inspect.
+        :param origin: origin of the dependency function.
+        :return: declared dependencies and type hints or None.
+        """
+        if isinstance(origin, type):
+            # If this is a class, we need to get signature of
+            # an __init__ method.
+            hints_target = origin.__init__  # type: ignore[misc]
+            sign_target = hints_target
+            source: Any = origin
+            description = f"a class {origin.__name__}"
+        elif isinstance(dep.dependency, FunctionType):
+            # If this is function, we get it's type hints.
+            hints_target = dep.dependency
+            sign_target = origin
+            source = dep.dependency
+            description = f"a function {dep.dependency.__name__}"
+        else:
+            # If this is an instance of a class,
+            # we get type hints of its __call__ method.
+            hints_target = dep.dependency.__call__  # type: ignore
+            sign_target = origin
+            source = dep.dependency.__class__
+            description = f"an object of class {source.__name__}"
+
+        try:
+            hints = get_type_hints(hints_target)
+        except NameError:
+            warnings.warn(
+                "Cannot resolve type hints for "
+                f"{description} defined "
+                f"at {_get_source_location(source)}.",
+                RuntimeWarning,
+                stacklevel=3,
+            )
+            return None
+        sign = inspect.signature(sign_target, **_SIGNATURE_KWARGS)
+        return _get_declared_dependencies(sign), hints
+
     def _build_graph(self) -> None:  # noqa: C901
         """
         Builds actual graph.
@@ -112,16 +503,16 @@ class DependencyGraph:
 
         :raises ValueError: if something happened.
         """
-        dep_deque = deque([Dependency(self.target, use_cache=True)])
-        # This is for `from __future__ import annotations` support.
-        # We need to use `eval_str` argument, because
-        # signature of the function is a string, not an object.
-        signature_kwargs: Dict[str, Any] = {}
-        if sys.version_info >= (3, 10):
-            signature_kwargs["eval_str"] = True
-
-        while dep_deque:
-            dep = dep_deque.popleft()
+        # Queue of dependencies to inspect. It's a list,
+        # because we only append to it and iterate over it in order.
+        # Breadth-first order matters, it defines the order of
+        # resolving independent dependencies.
+        dep_queue = [Dependency(self.target, use_cache=True)]
+        # Substitutions of type variables for generic dependants.
+        typevar_maps: Dict[Dependency, Dict[Any, Any]] = {}
+        replaced_deps = self.replaced_deps
+
+        for dep in dep_queue:
             # Skip adding dependency if it's already present.
             if dep in self.dependencies:
                 continue
@@ -129,11 +520,11 @@ class DependencyGraph:
                 continue
             # If we have replaced dependencies, we need to replace
             # them in the current dependency.
-            if self.replaced_deps and dep.dependency in self.replaced_deps:
-                dep.dependency = self.replaced_deps[dep.dependency]
+            if replaced_deps:
+                dep.dependency = replaced_deps.get(dep.dependency, dep.dependency)
             # We can say for sure that ParamInfo doesn't have any dependencies,
             # so we skip it.
-            if dep.dependency == ParamInfo:
+            if dep.dependency is ParamInfo:
                 continue
             # Get signature and type hints.
             origin = getattr(dep.dependency, "__origin__", None)
@@ -155,122 +546,43 @@ class DependencyGraph:
                         f"Please provide a type in param `{dep.parent.param_name}`"
                         f" of `{dep.parent.dependency}`",
                     )
-                # We zip together names of parameters and the substituted values
-                # for generics.
-                generics = zip(
-                    parent_cls_origin.__parameters__,
-                    parent_cls.__args__,  # type: ignore
-                )
-                for tvar, type_param in generics:
-                    # If we found the typevar we're currently try to resolve,
-                    # we need to find origin of the substituted class.
-                    if tvar == origin:
-                        dep.dependency = type_param
-                        origin = getattr(type_param, "__origin__", None)
-                        if origin is None:
-                            origin = type_param
-
-            if inspect.isclass(origin):
-                # If this is a class, we need to get signature of
-                # an __init__ method.
-                try:
-                    hints = get_type_hints(origin.__init__)
-                except NameError:
-                    _, src_lineno = inspect.getsourcelines(origin)
-                    src_file = Path(inspect.getfile(origin))
-                    cwd = Path.cwd()
-                    if src_file.is_relative_to(cwd):
-                        src_file = src_file.relative_to(cwd)
-                    warnings.warn(
-                        "Cannot resolve type hints for "
-                        f"a class {origin.__name__} defined "
-                        f"at {src_file}:{src_lineno}.",
-                        RuntimeWarning,
-                        stacklevel=2,
-                    )
-                    continue
-                sign = inspect.signature(
-                    origin.__init__,
-                    **signature_kwargs,
-                )
-            elif inspect.isfunction(dep.dependency):
-                # If this is function or an instance of a class, we get it's type hints.
-                try:
-                    hints = get_type_hints(dep.dependency)
-                except NameError:
-                    _, src_lineno = inspect.getsourcelines(dep.dependency)  # type: ignore
-                    src_file = Path(inspect.getfile(dep.dependency))
-                    cwd = Path.cwd()
-                    if src_file.is_relative_to(cwd):
-                        src_file = src_file.relative_to(cwd)
-                    warnings.warn(
-                        "Cannot resolve type hints for "
-                        f"a function {dep.dependency.__name__} defined "
-                        f"at {src_file}:{src_lineno}.",
-                        RuntimeWarning,
-                        stacklevel=2,
-                    )
-                    continue
-                sign = inspect.signature(origin, **signature_kwargs)  # type: ignore
-            else:
-                try:
-                    hints = get_type_hints(
-                        dep.dependency.__call__,  # type: ignore
-                    )
-                except NameError:
-                    _, src_lineno = inspect.getsourcelines(dep.dependency.__class__)
-                    src_file = Path(inspect.getfile(dep.dependency.__class__))
-                    cwd = Path.cwd()
-                    if src_file.is_relative_to(cwd):
-                        src_file = src_file.relative_to(cwd)
-                    cls_name = dep.dependency.__class__.__name__
-                    warnings.warn(
-                        "Cannot resolve type hints for "
-                        f"an object of class {cls_name} defined "
-                        f"at {src_file}:{src_lineno}.",
-                        RuntimeWarning,
-                        stacklevel=2,
-                    )
-                    continue
-                sign = inspect.signature(origin, **signature_kwargs)  # type: ignore
-
-            # Now we need to iterate over parameters, to
-            # find all parameters, that have TaskiqDepends as it's
-            # default vaule.
-            for param_name, param in sign.parameters.items():
-                default_value = param.default
-                if hasattr(param.annotation, "__metadata__"):
-                    # We go backwards,
-                    # because you may want to override your annotation
-                    # and the overriden value will appear to be after
-                    # the original `Depends` annotation.
-                    for meta in reversed(param.annotation.__metadata__):
-                        if isinstance(meta, Dependency):
-                            default_value = meta
-                            break
-                        if FastapiDepends is not None and isinstance(
-                            meta,
-                            FastapiDepends,
-                        ):
-                            default_value = meta
-                            break
-
-                # This is for FastAPI integration. So you can
-                # use Depends from taskiq mixed with fastapi's dependencies.
-                if FastapiDepends is not None and isinstance(
-                    default_value,
-                    FastapiDepends,
-                ):
-                    default_value = Dependency(
-                        dependency=default_value.dependency,
-                        use_cache=default_value.use_cache,
-                        signature=param,
+                # We map type variables of the generic class to
+                # the substituted values. The map is built once
+                # for all parameters of the parent.
+                typevars = typevar_maps.get(dep.parent)
+                if typevars is None:
+                    typevars = dict(
+                        zip(
+                            parent_cls_origin.__parameters__,
+                            parent_cls.__args__,  # type: ignore
+                        ),
                     )
+                    typevar_maps[dep.parent] = typevars
+                # If we found the typevar we're currently try to resolve,
+                # we need to find origin of the substituted class.
+                if origin in typevars:
+                    type_param = typevars[origin]
+                    dep.dependency = type_param
+                    origin = getattr(type_param, "__origin__", None)
+                    if origin is None:
+                        origin = type_param
 
-                # We check, that default value is an instance of
-                # TaskiqDepends.
-                if not isinstance(default_value, Dependency):
+            # Signatures of classes are taken from their __init__ methods,
+            # and are the same for all generic aliases of the class.
+            cache_key = origin if isinstance(origin, type) else dep.dependency
+            signature_info = _get_cached_signature(cache_key)
+            if signature_info is None:
+                signature_info = self._inspect_dependency(dep, origin)
+                # Dependency cannot be inspected.
+                if signature_info is None:
+                    self.fully_inspected = False
                     continue
+                _cache_signature(cache_key, signature_info)
+            declared_deps, hints = signature_info
+
+            # Now we need to iterate over parameters, that have
+            # TaskiqDepends as it's default value or annotation.
+            for param_name, param, default_value in declared_deps:
                 # If user haven't set the dependency,
                 # using TaskiqDepends constructor,
                 # we need to find variable's type hint.
@@ -282,7 +594,7 @@ class DependencyGraph:
                         dep_name = "unknown"
                         if dep.dependency is not None:
                             dep_mod = dep.dependency.__module__
-                            if inspect.isclass(dep.dependency):
+                            if isinstance(dep.dependency, type):
                                 dep_name = dep.dependency.__class__.__name__
                             else:
                                 dep_name = dep.dependency.__name__
@@ -318,13 +630,47 @@ class DependencyGraph:
                 if dep_obj.use_cache:
                     # If this dependency uses cache, we need to resolve
                     # it's dependencies further.
-                    dep_deque.append(dep_obj)
+                    dep_queue.append(dep_obj)
                 else:
                     # If this dependency doesn't use caches,
                     # we build a subgraph for this dependency.
-                    self.subgraphs[dep_obj] = DependencyGraph(
-                        dependency_func,
-                    )
+                    # Graphs are never modified, so subgraphs are shared
+                    # between all parameters that use the same function.
+                    subgraph = build_graph(dependency_func)
+                    self.fully_inspected &= subgraph.fully_inspected
+                    self.subgraphs[dep_obj] = subgraph
         # Now we perform topological sort of all dependencies.
         # Now we know the order we'll be using to resolve dependencies.
-        self.ordered_deps = list(TopologicalSorter(self.dependencies).static_order())
+        self.ordered_deps = _topological_order(self.dependencies)
+
+
+# Graphs that were built by build_graph.
+# Graphs are stored by weak references, so they're
+# removed from the cache when nobody uses them.
+_GRAPHS_CACHE: "WeakValueDictionary[Any, DependencyGraph]" = WeakValueDictionary()
+
+
+def build_graph(target: Callable[..., Any]) -> DependencyGraph:
+    """
+    Get dependency graph of a function.
+
+    Graphs are never modified after they're built,
+    so the same graph is returned for the same function
+    while it's used somewhere.
+
+    Graphs with dependencies that cannot be inspected
+    are built every time.
+
+    :param target: function to build graph for.
+    :return: dependency graph.
+    """
+    try:
+        graph = _GRAPHS_CACHE.get(target)
+    except TypeError:
+        # Unhashable targets cannot be cached.
+        return DependencyGraph(target)
+    if graph is None:
+        graph = DependencyGraph(target)
+        if graph.fully_inspected:
+            _GRAPHS_CACHE[target] = graph
+    return graph
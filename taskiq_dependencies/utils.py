@@ -1,7 +1,17 @@
 import inspect
 import sys
+from collections.abc import Coroutine
 from contextlib import _AsyncGeneratorContextManager, _GeneratorContextManager
-from typing import TYPE_CHECKING, Any, AsyncContextManager, ContextManager, Optional
+from functools import lru_cache
+from types import AsyncGeneratorType, GeneratorType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncContextManager,
+    ContextManager,
+    Final,
+    Optional,
+)
 
 if sys.version_info >= (3, 10):
     from typing import TypeGuard
@@ -23,6 +33,8 @@ class ParamInfo:
     and the definition will be None.
     """
 
+    __slots__ = ("definition", "graph", "name")
+
     def __init__(
         self,
         name: str,
@@ -44,7 +56,7 @@ def iscontextmanager(obj: Any) -> TypeGuard[ContextManager[Any]]:
     :param obj: object to check.
     :return: bool that indicates whether the object is a context manager or not.
     """
-    return issubclass(obj.__class__, _GeneratorContextManager)
+    return _get_type_kind(obj.__class__) == CONTEXT_MANAGER_KIND
 
 
 def isasynccontextmanager(obj: Any) -> TypeGuard[AsyncContextManager[Any]]:
@@ -54,4 +66,48 @@ def isasynccontextmanager(obj: Any) -> TypeGuard[AsyncContextManager[Any]]:
     :param obj: object to check.
     :return: bool that indicates whether the object is a async context manager or not.
     """
-    return issubclass(obj.__class__, _AsyncGeneratorContextManager)
+    return _get_type_kind(obj.__class__) == ASYNC_CONTEXT_MANAGER_KIND
+
+
+# Kinds of values that can be returned by dependencies.
+# Every kind requires its own way of resolving.
+VALUE_KIND: Final = 0
+GENERATOR_KIND: Final = 1
+ASYNC_GENERATOR_KIND: Final = 2
+COROUTINE_KIND: Final = 3
+CONTEXT_MANAGER_KIND: Final = 4
+ASYNC_CONTEXT_MANAGER_KIND: Final = 5
+
+
+def get_value_kind(value: Any) -> int:
+    """
+    Get kind of a value returned by dependency.
+
+    :param value: value to check.
+    :return: kind of the value.
+    """
+    return _get_type_kind(value.__class__)
+
+
+@lru_cache(maxsize=1024)
+def _get_type_kind(value_type: type) -> int:
+    """
+    Get kind of values of the given type.
+
+    Kind depends only on the type of a value,
+    so we calculate it once for every type.
+
+    :param value_type: type of a value.
+    :return: kind of values.
+    """
+    if issubclass(value_type, GeneratorType):
+        return GENERATOR_KIND
+    if issubclass(value_type, AsyncGeneratorType):
+        return ASYNC_GENERATOR_KIND
+    if issubclass(value_type, Coroutine):
+        return COROUTINE_KIND
+    if issubclass(value_type, _GeneratorContextManager):
+        return CONTEXT_MANAGER_KIND
+    if issubclass(value_type, _AsyncGeneratorContextManager):
+        return ASYNC_CONTEXT_MANAGER_KIND
+    return VALUE_KIND
@@ -1,4 +1,5 @@
 import sys
+import types
 from typing import Any
 from unittest.mock import patch
 
@@ -56,3 +57,29 @@ def test_dependency_swap_annotated() -> None:
             kwargs = ctx.resolve_kwargs()
 
         assert kwargs == {"dep_a": 1}
+
+
+def test_dependency_swap_imported_later() -> None:
+    """
+    Test that FastAPI's depends are found after FastAPI is imported.
+
+    This test checks that FastAPI's Depends class is looked up
+    in already imported modules, when it's needed.
+    """
+    fastapi_params = types.ModuleType("fastapi.params")
+    fastapi_params.Depends = MyFastapiDepends  # type: ignore
+    with patch("taskiq_dependencies.graph.FastapiDepends", None), patch.dict(
+        sys.modules,
+        {"fastapi.params": fastapi_params},
+    ):
+
+        def func_a() -> int:
+            return 1
+
+        def func_b(dep_a: int = MyFastapiDepends(func_a)) -> int:  # type: ignore
+            return dep_a
+
+        with DependencyGraph(func_b).sync_ctx() as ctx:
+            kwargs = ctx.resolve_kwargs()
+
+        assert kwargs == {"dep_a": 1}
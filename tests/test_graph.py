@@ -1,4 +1,3 @@
-import re
 import uuid
 from contextlib import asynccontextmanager, contextmanager
 from typing import (
@@ -7,13 +6,14 @@ from typing import (
     AsyncGenerator,
     Generator,
     Generic,
+    List,
     Tuple,
     TypeVar,
 )
 
 import pytest
 
-from taskiq_dependencies import DependencyGraph, Depends, ParamInfo
+from taskiq_dependencies import DependencyGraph, Depends, ParamInfo, build_graph
 
 
 @pytest.mark.anyio
@@ -44,7 +44,8 @@ async def test_dependency_async_successful() -> None:
         return a
 
     with DependencyGraph(testfunc).sync_ctx({}) as sctx, pytest.warns(
-        match=re.compile(".*was never awaited.*"),
+        RuntimeWarning,
+        match=r"was never awaited",
     ), pytest.raises(RuntimeError):
         assert sctx.resolve_kwargs() == {"a": 1}
 
@@ -312,6 +313,30 @@ async def test_initial_ctx() -> None:
         assert await actx.resolve_kwargs() == {"test": True}
 
 
+@pytest.mark.anyio
+async def test_initial_ctx_no_cache() -> None:
+    """Tests that initial context is used by dependencies without cache."""
+    calls = 0
+
+    class TeCtx:
+        def __init__(self) -> None:
+            nonlocal calls
+            calls += 1
+
+    val = TeCtx()
+
+    def target(test: TeCtx = Depends(use_cache=False)) -> TeCtx:
+        return test
+
+    with DependencyGraph(target).sync_ctx({TeCtx: val}) as sctx:
+        assert sctx.resolve_kwargs() == {"test": val}
+
+    async with DependencyGraph(target).async_ctx({TeCtx: val}) as actx:
+        assert await actx.resolve_kwargs() == {"test": val}
+
+    assert calls == 1
+
+
 def test_unknown_dependency_func() -> None:
     """Tests that error is raised for unknown deps."""
 
@@ -780,6 +805,96 @@ async def test_replaced_dep_subdependencies() -> None:
         assert kwargs["val"] == 321
 
 
+def test_replaced_dep_graphs_reused() -> None:
+    def replaced() -> int:
+        return 321
+
+    def other_replaced() -> int:
+        return 1
+
+    def dep() -> int:
+        return 123
+
+    def target(val: int = Depends(dep)) -> None:
+        """Stub function."""
+
+    graph = DependencyGraph(target=target)
+    with graph.sync_ctx(replaced_deps={dep: replaced}) as ctx:
+        first_graph = ctx.graph
+        assert ctx.resolve_kwargs() == {"val": 321}
+    with graph.sync_ctx(replaced_deps={dep: replaced}) as ctx:
+        assert ctx.graph is first_graph
+        assert ctx.resolve_kwargs() == {"val": 321}
+    with graph.sync_ctx(replaced_deps={dep: other_replaced}) as ctx:
+        assert ctx.graph is not first_graph
+        assert ctx.resolve_kwargs() == {"val": 1}
+
+
+def test_replaced_dep_graphs_not_inspected(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that replaced graphs with skipped dependencies are rebuilt."""
+
+    def sub() -> int:
+        return 5
+
+    def replaced(v: "_LaterDefined" = Depends(sub)) -> int:  # type: ignore # noqa: F821
+        return v
+
+    def dep() -> int:
+        return 1
+
+    def target(val: int = Depends(dep)) -> int:
+        return val
+
+    graph = DependencyGraph(target=target)
+    for _ in range(2):
+        with pytest.warns(
+            RuntimeWarning,
+            match=r"Cannot resolve.*function replaced.*",
+        ), graph.sync_ctx(replaced_deps={dep: replaced}) as ctx:
+            first_graph = ctx.graph
+            assert not ctx.graph.fully_inspected
+    monkeypatch.setitem(globals(), "_LaterDefined", int)
+    with graph.sync_ctx(replaced_deps={dep: replaced}) as ctx:
+        assert ctx.graph is not first_graph
+        assert ctx.resolve_kwargs() == {"val": 5}
+
+
+def test_no_cache_subgraphs_shared() -> None:
+    calls = 0
+
+    def dep() -> int:
+        nonlocal calls
+        calls += 1
+        return calls
+
+    def target(
+        a: int = Depends(dep, use_cache=False),
+        b: int = Depends(dep, use_cache=False),
+    ) -> None:
+        """Stub function."""
+
+    graph = DependencyGraph(target=target)
+    subgraphs = list(graph.subgraphs.values())
+    assert len(subgraphs) == 2
+    assert subgraphs[0] is subgraphs[1]
+    with graph.sync_ctx() as ctx:
+        assert ctx.resolve_kwargs() == {"a": 1, "b": 2}
+
+
+def test_build_graph_reused() -> None:
+    def dep() -> int:
+        return 1
+
+    def target(a: int = Depends(dep)) -> None:
+        """Stub function."""
+
+    graph = build_graph(target)
+    assert build_graph(target) is graph
+    assert build_graph(dep) is not graph
+    with graph.sync_ctx() as ctx:
+        assert ctx.resolve_kwargs() == {"a": 1}
+
+
 def test_kwargs_caches() -> None:
     """
     Test that kwarged caches work.
@@ -806,6 +921,67 @@ def test_kwargs_caches() -> None:
         assert target(**kwargs) == 3
 
 
+def test_kwargs_caches_reused() -> None:
+    """Test that dependencies with same kwargs are calculated once."""
+    calls = 0
+
+    def random_dep(a: int) -> int:
+        nonlocal calls
+        calls += 1
+        return a
+
+    def target(
+        a: int = Depends(random_dep, kwargs={"a": 1}),
+        b: int = Depends(random_dep, kwargs={"a": 1}),
+        c: int = Depends(random_dep, kwargs={"a": 2}),
+    ) -> int:
+        return a + b + c
+
+    with DependencyGraph(target=target).sync_ctx() as ctx:
+        assert target(**ctx.resolve_kwargs()) == 4
+    assert calls == 2
+
+
+def test_kwargs_caches_unhashable() -> None:
+    """Test that kwarged caches work with unhashable kwargs."""
+    calls = 0
+
+    def random_dep(a: List[int]) -> int:
+        nonlocal calls
+        calls += 1
+        return sum(a)
+
+    def dep(val: int = Depends(random_dep, kwargs={"a": [1, 2]})) -> int:
+        return val
+
+    def target(
+        a: int = Depends(random_dep, kwargs={"a": [1, 2]}),
+        b: int = Depends(random_dep, kwargs={"a": [3]}),
+        c: int = Depends(dep),
+    ) -> int:
+        return a + b + c
+
+    with DependencyGraph(target=target).sync_ctx() as ctx:
+        assert target(**ctx.resolve_kwargs()) == 9
+    assert calls == 2
+
+
+def test_kwargs_with_subdependencies() -> None:
+    """Test that kwargs are passed along with resolved sub-dependencies."""
+
+    def sub_dep() -> int:
+        return 10
+
+    def dep(a: int, b: int = Depends(sub_dep)) -> int:
+        return a + b
+
+    def target(val: int = Depends(dep, kwargs={"a": 1})) -> int:
+        return val
+
+    with DependencyGraph(target=target).sync_ctx() as ctx:
+        assert ctx.resolve_kwargs() == {"val": 11}
+
+
 def test_skip_not_decorated_managers() -> None:
     """
     Test that synct context skip context managers.